@@ -1,10 +1,21 @@
-"""USAGE: python -m teletype [codes|components|io]
+"""USAGE: python -m teletype [codes|components|io|bench]
 
 This file is only included for testing terminal capabilities. Teletype is
-intended to be imported as a library, not run as a module."""
+intended to be imported as a library, not run as a module.
 
+The bench mode is non-interactive; it measures the terminal attached to stderr
+and prints a JSON report to stdout."""
 
+
+import json
+import os
+import sys
+from re import match
+from select import select
+from statistics import median
 from sys import argv
+from time import monotonic
+from typing import List, Optional, Tuple
 
 from teletype import codes, components, io
 
@@ -177,6 +188,159 @@ def demo_components_progressbar():
         io.get_key()
 
 
+# BENCH ------------------------------------------------------------------------
+
+BENCH_BYTES = 4 * 1024 * 1024
+BENCH_FRAMES = 1000
+BENCH_QUERIES = 5
+BENCH_TIMEOUT = 1.0
+
+
+def query(console: io.Console, request: str = "") -> Optional[Tuple[List[str], float]]:
+    """Sends request followed by a cursor position query and awaits the replies
+
+    Terminals reply to queries in order, so once the cursor position report has
+    arrived any reply to request has too, and all prior output has been
+    processed. Returns the replies and the round trip time in seconds, or None
+    if the console isn't a terminal or doesn't reply in time.
+    """
+    fd = console.input_fd
+    out_fd = console.output_fd
+    if fd is None or out_fd is None or not (os.isatty(fd) and os.isatty(out_fd)):
+        return None
+    replies: List[str] = []
+    with io.raw_mode(console):
+        start = monotonic()
+        console.write(request + codes.TERMINAL["cursor-position"])
+        console.flush()
+        while not (replies and replies[-1].endswith("R")):
+            remaining = start + BENCH_TIMEOUT - monotonic()
+            try:
+                ready = console.pending() or select([fd], [], [], max(remaining, 0))[0]
+            except (OSError, ValueError):
+                return None
+            if not ready:
+                return None
+            replies.append(console.read_key())
+    return replies, monotonic() - start
+
+
+def bench_write(console: io.Console) -> float:
+    """Returns how many bytes per second the terminal can process"""
+    line = "/" * max(console.size.columns - 1, 1) + "\r"
+    chunk = line * max(65536 // len(line), 1)
+    written = 0
+    start = monotonic()
+    while written < BENCH_BYTES:
+        console.write(chunk)
+        console.flush()
+        written += len(chunk)
+    query(console)
+    elapsed = monotonic() - start
+    console.write(codes.CURSOR["eol"])
+    console.flush()
+    return written / elapsed
+
+
+def bench_progressbar(console: io.Console) -> float:
+    """Returns how many ProgressBar redraws per second the terminal can process"""
+    console.write("\n")
+    progressbar = components.ProgressBar("bench", console=console)
+    start = monotonic()
+    for step in range(BENCH_FRAMES + 1):
+        progressbar.update(step, BENCH_FRAMES)
+    query(console)
+    elapsed = monotonic() - start
+    io.erase_lines(1, console=console)
+    return BENCH_FRAMES / elapsed
+
+
+def bench_selectone(console: io.Console) -> float:
+    """Returns how many SelectOne redraws per second the terminal can process
+
+    Keys are fed to the picker through a pipe so that it can be driven without
+    user input, scrolling down a screen at a time to redraw every line.
+    """
+    read_fd, write_fd = os.pipe()
+    rows = max(console.size.lines - 1, 1)
+    keys = codes.KEYS["page-down"] * BENCH_FRAMES + codes.KEYS["lf"]
+    os.write(write_fd, keys.encode())
+    os.close(write_fd)
+    picker_console = io.Console(read_fd, console.stdout)
+    picker_console.resize(*console.size)
+    picker = components.SelectOne(range(rows * (BENCH_FRAMES + 1)), picker_console)
+    try:
+        start = monotonic()
+        picker.prompt()
+        query(console)
+        elapsed = monotonic() - start
+    finally:
+        os.close(read_fd)
+    io.erase_lines(rows, console=console)
+    return BENCH_FRAMES / elapsed
+
+
+def probe_latency(console: io.Console) -> Optional[float]:
+    """Returns the median round trip time of a cursor position query in ms"""
+    times = []
+    for _ in range(BENCH_QUERIES):
+        result = query(console)
+        if result is None:
+            return None
+        times.append(result[1] * 1000)
+    return round(median(times), 3)
+
+
+def probe_synchronized_output(console: io.Console) -> Optional[bool]:
+    """Returns whether the terminal supports synchronized output, if known"""
+    result = query(console, codes.TERMINAL["sync-query"])
+    if result is None:
+        return None
+    for reply in result[0]:
+        mode = match(r"\x1b\[\?2026;(\d)\$y", reply)
+        if mode:
+            # 0 is unrecognised and 4 is permanently reset
+            return mode.group(1) in "123"
+    return False
+
+
+def probe_truecolor() -> bool:
+    """Returns whether the terminal advertises 24-bit colour support"""
+    return os.environ.get("COLORTERM", "").lower() in ("truecolor", "24bit")
+
+
+def bench():
+    """Measures the terminal attached to stderr and prints a JSON report"""
+    console = io.Console(sys.stdin, sys.stderr)
+    size = console.size
+    tty = console.output_fd is not None and os.isatty(console.output_fd)
+    report = {
+        "term": os.environ.get("TERM"),
+        "tty": tty,
+        "size": [size.columns, size.lines],
+        "write_bytes_per_second": None,
+        "progressbar_fps": None,
+        "selectone_fps": None,
+        "cursor_query_latency_ms": None,
+        "synchronized_output": None,
+        "truecolor": probe_truecolor(),
+    }
+    # output which isn't going to a terminal has nothing to measure
+    if not tty:
+        print(json.dumps(report, indent=2))
+        return
+    io.hide_cursor(console=console)
+    try:
+        report["write_bytes_per_second"] = round(bench_write(console))
+        report["progressbar_fps"] = round(bench_progressbar(console), 1)
+        report["selectone_fps"] = round(bench_selectone(console), 1)
+        report["cursor_query_latency_ms"] = probe_latency(console)
+        report["synchronized_output"] = probe_synchronized_output(console)
+    finally:
+        io.show_cursor(console=console)
+    print(json.dumps(report, indent=2))
+
+
 # ENTRYPOINT -------------------------------------------------------------------
 
 
@@ -228,4 +392,7 @@ def demo():
 
 
 if __name__ == "__main__":
-    demo()
+    if "bench" in argv:
+        bench()
+    else:
+        demo()
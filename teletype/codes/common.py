@@ -23,6 +23,7 @@ CURSOR = {
     "clear": "\x1b[3J\x1b[H\x1b[2J",
     "down": "\x1b[B",
     "eol": "\x1b[K",
+    "eos": "\x1b[J",
     "hide": "\x1b[?25l",
     "left": "\x08",
     "right": "\x1b[C",
@@ -30,6 +31,14 @@ CURSOR = {
     "up": "\x1b[A",
 }
 
+CURSOR_N = {
+    "column": "\x1b[%dG",
+    "down": "\x1b[%dB",
+    "left": "\x1b[%dD",
+    "right": "\x1b[%dC",
+    "up": "\x1b[%dA",
+}
+
 ESCAPE_SEQUENCES = {
     "\x1b",
     "\x1b[",
@@ -77,11 +86,15 @@ KEYS = {
     "ctrl-d": "\x04",
     "ctrl-e": "\x05",
     "ctrl-f": "\x06",
+    "ctrl-n": "\x0e",
+    "ctrl-t": "\x14",
     "ctrl-z": "\x1a",
     "down": "\x1b[B",
     "left": "\x1b[D",
     "right": "\x1b[C",
     "up": "\x1b[A",
+    "shift-down": "\x1b[1;2B",
+    "shift-up": "\x1b[1;2A",
     "f1": "\x1bOP",
     "f2": "\x1bOQ",
     "f3": "\x1bOR",
@@ -101,11 +114,38 @@ KEYS = {
     "insert": "\x1b[2~",
     "page-down": "\x1b[6~",
     "page-up": "\x1b[5~",
+    "paste-end": "\x1b[201~",
+    "paste-start": "\x1b[200~",
     "super": "\x1b[3~",
 }
 
 KEYS_FLIPPED = {v: k for k, v in KEYS.items()}
 
+# alternate sequences sent by common terminal emulators
+KEYS_FLIPPED.update(
+    {
+        "\x1b[1~": "home",
+        "\x1b[4~": "end",
+        "\x1b[7~": "home",
+        "\x1b[8~": "end",
+        "\x1b[11~": "f1",
+        "\x1b[12~": "f2",
+        "\x1b[13~": "f3",
+        "\x1b[14~": "f4",
+        "\x1b[15~": "f5",
+        "\x1b[17~": "f6",
+        "\x1b[18~": "f7",
+        "\x1b[19~": "f8",
+        "\x1b[20~": "f9",
+        "\x1b[21~": "f10",
+        "\x1b[23~": "f11",
+        "\x1b[24~": "f12",
+        "\x1bOF": "end",
+        "\x1bOH": "home",
+        "\x7f": "backspace",
+    }
+)
+
 MODES = {
     "blink": "\x1b[5m",
     "bold": "\x1b[1m",
@@ -117,3 +157,12 @@ MODES = {
     "underline": "\x1b[4m",
     "reset": "\x1b[0m",
 }
+
+TERMINAL = {
+    "cursor-position": "\x1b[6n",
+    "paste-off": "\x1b[?2004l",
+    "paste-on": "\x1b[?2004h",
+    "sync-begin": "\x1b[?2026h",
+    "sync-end": "\x1b[?2026l",
+    "sync-query": "\x1b[?2026$p",
+}
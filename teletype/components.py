@@ -1,5 +1,20 @@
-import os
-from typing import Any, Dict, Generic, Iterable, List, Optional, Set, Tuple, Union
+import logging
+from itertools import chain
+from threading import Timer
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from teletype import codes, io
 from teletype.typedef import TSTYLE, V
@@ -9,10 +24,87 @@ __all__ = [
     "SelectApproval",
     "SelectMany",
     "ProgressBar",
+    "PinnedFooter",
+    "FooterHandler",
     "ChoiceHelper",
+    "ChoiceStore",
+    "GapBuffer",
+    "Selection",
+    "TextArea",
+    "TextInput",
 ]
 
 
+KEYMAP_VIM = {
+    "j": "down",
+    "k": "up",
+}
+
+KEYMAP_DEFAULT: Dict[str, Union[str, int]] = {
+    "ctrl-b": "page-up",
+    "ctrl-c": "interrupt",
+    "ctrl-d": "interrupt",
+    "ctrl-f": "page-down",
+    "ctrl-z": "interrupt",
+    "down": "down",
+    "end": "last",
+    "home": "first",
+    "lf": "submit",
+    "page-down": "page-down",
+    "page-up": "page-up",
+    "paste": "paste",
+    "up": "up",
+}
+KEYMAP_DEFAULT.update(KEYMAP_VIM)
+KEYMAP_DEFAULT.update(dict.fromkeys(codes.ESCAPE_SEQUENCES, "interrupt"))
+
+KEYMAP_MANY = KEYMAP_DEFAULT.copy()
+KEYMAP_MANY.update(
+    {
+        "ctrl-a": "select-all",
+        "ctrl-n": "select-none",
+        "ctrl-t": "invert",
+        "shift-down": "select-down",
+        "shift-up": "select-up",
+        "space": "toggle",
+    }
+)
+
+KEYMAP_TEXT = {
+    "backspace": "backspace",
+    "cr": "submit",
+    "ctrl-a": "line-start",
+    "ctrl-b": "left",
+    "ctrl-c": "interrupt",
+    "ctrl-d": "interrupt",
+    "ctrl-e": "line-end",
+    "ctrl-f": "right",
+    "ctrl-z": "interrupt",
+    "delete": "delete",
+    "down": "down",
+    "end": "line-end",
+    "home": "line-start",
+    "left": "left",
+    "lf": "submit",
+    "paste": "paste",
+    "right": "right",
+    "space": "space",
+    "super": "delete",  # CSI 3 ~, which is sent by the delete key
+    "up": "up",
+}
+
+KEYMAP_TEXT_AREA = KEYMAP_TEXT.copy()
+KEYMAP_TEXT_AREA.update(
+    {
+        "cr": "newline",
+        "ctrl-d": "submit",
+        "lf": "newline",
+        "page-down": "page-down",
+        "page-up": "page-up",
+    }
+)
+
+
 class ChoiceHelper(Generic[V]):
     """Helper class for packaging and displaying objects as choices"""
 
@@ -94,92 +186,438 @@ class ChoiceHelper(Generic[V]):
             raise ValueError("mnemonic not present in value or label")
 
 
+class Selection:
+    """A compact set of selected line numbers backed by a bytearray
+
+    Bulk operations run over the whole bytearray at once and the number of
+    selected lines is tracked as it changes, so len is O(1). Iterating yields
+    selected line numbers in ascending order.
+    """
+
+    _INVERT = bytes((1, 0)) + bytes(254)
+
+    def __init__(self, size: int = 0):
+        self._bits = bytearray(size)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, line: int) -> bool:
+        return 0 <= line < len(self._bits) and self._bits[line] == 1
+
+    def __iter__(self) -> Iterator[int]:
+        find = self._bits.find
+        line = find(1)
+        while line != -1:
+            yield line
+            line = find(1, line + 1)
+
+    def __repr__(self):
+        return "Selection(%d/%d)" % (self._count, len(self._bits))
+
+    @property
+    def size(self) -> int:
+        """Returns the number of lines that can be selected"""
+        return len(self._bits)
+
+    def resize(self, size: int):
+        """Grows or shrinks the selectable range, preserving the selection"""
+        if size < len(self._bits):
+            self._count -= self._bits.count(1, size)
+            del self._bits[size:]
+        else:
+            self._bits.extend(bytes(size - len(self._bits)))
+
+    def toggle(self, line: int) -> bool:
+        """Flips the selection state of a line and returns its new state"""
+        selected = self._bits[line] == 0
+        self._bits[line] = selected
+        self._count += 1 if selected else -1
+        return selected
+
+    def select_all(self):
+        """Selects every line"""
+        self._bits = bytearray(b"\x01") * len(self._bits)
+        self._count = len(self._bits)
+
+    def clear(self):
+        """Deselects every line"""
+        self._bits = bytearray(len(self._bits))
+        self._count = 0
+
+    def invert(self):
+        """Selects unselected lines and deselects selected ones"""
+        self._bits = self._bits.translate(self._INVERT)
+        self._count = len(self._bits) - self._count
+
+    def select(self, lines: Iterable[int]):
+        """Selects each of the given lines"""
+        bits = self._bits
+        for line in lines:
+            if bits[line] == 0:
+                bits[line] = 1
+                self._count += 1
+
+    def select_range(self, start: int, stop: int, selected: bool = True):
+        """Selects or deselects lines from start up to but not including stop"""
+        start, stop, _ = slice(start, stop).indices(len(self._bits))
+        if stop <= start:
+            return
+        count = self._bits.count(1, start, stop)
+        if selected:
+            self._bits[start:stop] = b"\x01" * (stop - start)
+            self._count += stop - start - count
+        else:
+            self._bits[start:stop] = bytes(stop - start)
+            self._count -= count
+
+
+class GapBuffer(Generic[V]):
+    """A list with a gap at its cursor, making edits at the cursor cheap
+
+    Inserting and deleting at the cursor is O(1) amortized; moving the cursor
+    costs time proportional to the distance moved.
+    """
+
+    def __init__(self, items: Iterable[V] = ()):
+        self._items: List[Any] = list(items)
+        self._start = len(self._items)
+        self._end = len(self._items)
+
+    def __len__(self):
+        return len(self._items) - self._end + self._start
+
+    def __getitem__(self, index: int) -> V:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("GapBuffer index out of range")
+        if index >= self._start:
+            index += self._end - self._start
+        return self._items[index]
+
+    def __iter__(self) -> Iterator[V]:
+        yield from self._items[: self._start]
+        yield from self._items[self._end :]
+
+    def __repr__(self):
+        return "GapBuffer(%r)" % list(self)
+
+    @property
+    def cursor(self) -> int:
+        """Returns the position of the cursor, i.e. the start of the gap"""
+        return self._start
+
+    def move(self, position: int):
+        """Moves the cursor to position"""
+        position = min(max(position, 0), len(self))
+        if position < self._start:
+            count = self._start - position
+            self._items[self._end - count : self._end] = self._items[
+                position : self._start
+            ]
+            self._start -= count
+            self._end -= count
+        elif position > self._start:
+            count = position - self._start
+            self._items[self._start : position] = self._items[
+                self._end : self._end + count
+            ]
+            self._start += count
+            self._end += count
+
+    def insert(self, items: Iterable[V]):
+        """Inserts items before the cursor"""
+        items = list(items)
+        count = len(items)
+        if self._end - self._start < count:
+            grow = max(count, len(self), 16)
+            self._items[self._end : self._end] = [None] * grow
+            self._end += grow
+        self._items[self._start : self._start + count] = items
+        self._start += count
+
+    def delete(self, count: int = 1) -> List[V]:
+        """Removes and returns up to count items after the cursor"""
+        count = min(count, len(self._items) - self._end)
+        items = self._items[self._end : self._end + count]
+        self._items[self._end : self._end + count] = [None] * count
+        self._end += count
+        return items
+
+    def backspace(self, count: int = 1) -> List[V]:
+        """Removes and returns up to count items before the cursor"""
+        count = min(count, self._start)
+        items = self._items[self._start - count : self._start]
+        self._items[self._start - count : self._start] = [None] * count
+        self._start -= count
+        return items
+
+
+class ChoiceStore:
+    """Deduplicated storage for choices which are only fetched once needed
+
+    Choices can be sourced from any iterable, including generators, or from a
+    callable taking an offset and a limit and returning a page of choices, e.g.
+    rows from a database cursor. Duplicates are dropped using a hash set,
+    falling back to a linear search for unhashable choices.
+    """
+
+    def __init__(
+        self,
+        source: Union[Iterable, Callable[[int, int], Iterable]],
+        page_size: int = 100,
+    ):
+        if callable(source) and not hasattr(source, "__iter__"):
+            source = self._paginate(source, page_size)  # type: ignore
+        self._source: Optional[Iterator] = iter(source)  # type: ignore
+        self._items: List[Any] = []
+        self._seen: Set[Any] = set()
+        self._unhashable: List[Any] = []
+        self.mnemonics: Dict[str, int] = {}
+
+    def __len__(self):
+        return self.load(-1)
+
+    def __iter__(self) -> Iterator[Any]:
+        line = 0
+        while line < self.load(line + 1):
+            yield self._items[line]
+            line += 1
+
+    def __getitem__(self, line: int) -> Any:
+        if line < 0:
+            self.load(-1)
+        else:
+            self.load(line + 1)
+        return self._items[line]
+
+    @staticmethod
+    def _paginate(fetch: Callable[[int, int], Iterable], limit: int) -> Iterator:
+        offset = 0
+        while True:
+            page = list(fetch(offset, limit))
+            yield from page
+            if len(page) < limit:
+                return
+            offset += len(page)
+
+    @property
+    def loaded(self) -> int:
+        """Returns the number of choices fetched so far"""
+        return len(self._items)
+
+    @property
+    def exhausted(self) -> bool:
+        """Returns True once every choice has been fetched from the source"""
+        return self._source is None
+
+    def load(self, count: int) -> int:
+        """Fetches choices until count are loaded, or all of them if negative
+
+        Returns the number of choices loaded, which is less than count if the
+        source was exhausted first.
+        """
+        items = self._items
+        while self._source is not None and (count < 0 or len(items) < count):
+            try:
+                choice = next(self._source)
+            except StopIteration:
+                self._source = None
+                break
+            try:
+                if choice in self._seen:
+                    continue
+                self._seen.add(choice)
+            except TypeError:
+                if choice in self._unhashable:
+                    continue
+                self._unhashable.append(choice)
+            if isinstance(choice, ChoiceHelper) and choice.mnemonic:
+                self.mnemonics[choice.mnemonic] = len(items)
+            items.append(choice)
+        return len(items)
+
+
 class SelectOne:
     """Allows the user to make a single selection
 
     - Use arrow keys or 'j' and 'k' to highlight selection
+    - Use page-up and page-down to move a page, home and end to move to the ends
     - Press mnemonic keys to move to ChoiceHelper, another time to submit
+    - Paste a choice's label to move to it
     - Use return key to submit
+
+    Key bindings can be changed using keymap, which maps key names to either
+    action names or to a number of lines to jump by, e.g. {"J": 10, "K": -10}.
+
+    Choices can be any iterable or a ChoiceStore source. Only as many choices as
+    fit on the screen are shown, and choices are only fetched once they're
+    scrolled to.
     """
 
     _multiselect = False
+    _keymap = KEYMAP_DEFAULT
 
-    def __init__(self, choices: Iterable, **chars: str):
-        self.chars = codes.CHARS_DEFAULT.copy()
+    def __init__(
+        self,
+        choices: Union[Iterable, Callable[[int, int], Iterable]],
+        console: Optional[io.Console] = None,
+        keymap: Optional[Dict[str, Union[str, int]]] = None,
+        **chars: str,
+    ):
+        self.console = console or io.DEFAULT_CONSOLE
+        self.chars = self.console.chars.copy()
         self.chars.update(chars)
-        self._mnemonic_idx_map: Dict[str, int] = {}
-        self._choices: List[Any] = []
-        for choice in choices:
-            if choice in self._choices:
-                continue
-            self._choices.append(choice)
-            if isinstance(choice, ChoiceHelper) and choice.mnemonic:
-                self._mnemonic_idx_map[choice.mnemonic] = len(self._mnemonic_idx_map)
+        if isinstance(choices, ChoiceStore):
+            self._store = choices
+        else:
+            self._store = ChoiceStore(choices)
         self._line = 0
-        self._selected_lines: Set[int] = set()
+        self._top = 0
+        self._rows = 0
+        self._renderer = io.Renderer(self.console)
+        self.selection = Selection()
+        self._submitted = False
+        self._actions = self._bind_actions()
+        self.keymap = self._keymap.copy()
+        self._vim_keys = set(KEYMAP_VIM)
+        for key, action in (keymap or {}).items():
+            if not isinstance(action, int) and action not in self._actions:
+                raise ValueError("unknown action %r for key %r" % (action, key))
+            self.keymap[key] = action
+            self._vim_keys.discard(key)
 
     def __len__(self):
-        return len(self.choices)
+        return len(self._store)
 
     def __hash__(self):
         return self.choices.__hash__()
 
-    def _display_choice(self, idx: int, choice: Any):
-        print(" %s %s" % (self.chars["arrow"] if idx == 0 else " ", choice))
+    def _format_choice(self, line: int, choice: Any) -> str:
+        return " %s %s" % (self.chars["arrow"] if line == self._line else " ", choice)
+
+    def _bind_actions(self) -> Dict[str, Callable[[str], Any]]:
+        return {
+            "up": lambda _: self._move_line(-1),
+            "down": lambda _: self._move_line(1),
+            "page-up": lambda _: self._move_line(-self._page_size, wrap=False),
+            "page-down": lambda _: self._move_line(self._page_size, wrap=False),
+            "first": lambda _: self._move_line(-self._line),
+            "last": lambda _: self._move_line(len(self._store) - 1 - self._line),
+            "paste": self._paste,
+            "submit": self._submit,
+            "interrupt": self._interrupt,
+        }
 
     def _select_line(self):
-        self._selected_lines ^= {self._line}
-        io.move_cursor(cols=1)
-        if self._line in self._selected_lines:
-            char = self.chars["selected"]
+        self.selection.toggle(self._line)
+        self._render()
+
+    def _sync_selection(self):
+        if self.selection.size < self._store.loaded:
+            self.selection.resize(self._store.loaded)
+
+    @property
+    def _page_size(self) -> int:
+        return max(self.console.size.lines - 1, 1)
+
+    def _render(self):
+        lines = [
+            self._format_choice(line, self._store[line])
+            for line in range(self._top, self._top + self._rows)
+        ]
+        self._renderer.render(lines, self._line - self._top)
+
+    def _move_line(self, distance: int, wrap: bool = True) -> int:
+        offset = self._goto(distance, wrap)
+        if offset:
+            self._render()
+        return offset
+
+    def _goto(self, distance: int, wrap: bool) -> int:
+        line = self._line + distance
+        if wrap and line < 0:
+            # wrapping around to the end requires every choice to be fetched
+            count = len(self._store)
+        else:
+            count = self._store.load(max(line, 0) + 1)
+        if wrap:
+            line %= count
         else:
-            char = self.chars["unselected"]
-        print(char, end="")
-        io.move_cursor(cols=-2)
-
-    def _move_line(self, distance: int) -> int:
-        col_offset = 1 if self._multiselect else 2
-        g_cursor = self.chars["arrow"]
-        offset = (self._line + distance) % len(self.choices) - self._line
+            line = min(max(line, 0), count - 1)
+        offset = line - self._line
         if offset == 0:
             return 0
-        self._line += offset
-        print(" " * col_offset, end="")
-        io.move_cursor(rows=offset, cols=-col_offset)
-        print("%s%s" % (" " * (col_offset - 1), g_cursor), end="")
-        io.move_cursor(cols=-col_offset)
+        self._sync_selection()
+        self._line = line
+        if line < self._top:
+            self._top = line
+        elif line >= self._top + self._rows:
+            self._top = line - self._rows + 1
         return offset
 
-    def _process_keypress(self):
-        while True:
-            key = io.get_key()
-            # navigation key pressed; vim keys allowed when mnemonics not in use
-            if key == "up" or (key == "k" and not self._mnemonic_idx_map):
-                self._move_line(-1)
-            elif key == "down" or (key == "j" and not self._mnemonic_idx_map):
-                self._move_line(1)
-            # space pressed
-            elif self._multiselect and key == "space":
+    def _select_mnemonic(self, key: str):
+        dist = self._store.mnemonics[key] - self._line
+        self._move_line(dist)
+        if dist == 0:
+            # on second keypress...
+            if self._multiselect:
                 self._select_line()
-            # enter pressed
-            elif key in ("lf", "nl"):
+            else:
+                self._submit(key)
+
+    @staticmethod
+    def _label(choice: Any) -> str:
+        if isinstance(choice, ChoiceHelper):
+            return choice._str
+        return io.strip_format(str(choice)).strip()
+
+    @staticmethod
+    def _pasted_lines(key: str) -> List[str]:
+        lines = (line.strip() for line in getattr(key, "text", "").splitlines())
+        return [line for line in lines if line]
+
+    def _paste(self, key: str):
+        lines = self._pasted_lines(key)
+        if not lines:
+            return
+        query = lines[0]
+        found = -1
+        for line, choice in enumerate(self._store):
+            label = self._label(choice)
+            if label == query:
+                found = line
                 break
-            # mnemonic pressed
-            elif self._mnemonic_idx_map.get(key) is not None:
-                choice_count = len(self.choices)
-                mnemonic_count = len(self._mnemonic_idx_map)
-                mnemonic_idx = self._mnemonic_idx_map[key]
-                dist = choice_count - mnemonic_count - self._line + mnemonic_idx
-                self._move_line(dist)
-                if dist == 0:
-                    # on second keypress...
-                    if self._multiselect:
-                        self._select_line()
-                    else:
-                        break
-            # escape sequences pressed
-            elif key in {"ctrl-c", "ctrl-d", "ctrl-z"} | codes.ESCAPE_SEQUENCES:
-                raise KeyboardInterrupt("%s pressed" % key)
+            if found == -1 and label.startswith(query):
+                found = line
+        if found != -1:
+            self._move_line(found - self._line, wrap=False)
+
+    def _submit(self, _: str):
+        self._submitted = True
+
+    @staticmethod
+    def _interrupt(key: str):
+        raise KeyboardInterrupt("%s pressed" % key)
+
+    def _process_keypress(self):
+        self._submitted = False
+        while not self._submitted:
+            key = io.get_key(console=self.console)
+            if self._store.mnemonics:
+                if key in self._store.mnemonics:
+                    self._select_mnemonic(key)
+                    continue
+                # vim keys would otherwise shadow mnemonics
+                if key in self._vim_keys:
+                    continue
+            action = self.keymap.get(key)
+            if isinstance(action, int):
+                self._move_line(action, wrap=False)
+            elif action is not None:
+                self._actions[action](key)
 
     @staticmethod
     def _strip_choice(choice: Any) -> Any:
@@ -192,96 +630,614 @@ class SelectOne:
     @property
     def choices(self) -> Tuple:
         """Returns read-only tuple of choices"""
-        return tuple(self._choices)
+        return tuple(self._store)
 
     @property
     def highlighted(self) -> Any:
         """Returns the value for the currently highlighted choice"""
-        choice = self.choices[self._line % len(self.choices)]
-        return self._strip_choice(choice)
+        return self._strip_choice(self._store[self._line])
 
     @property
     def selected(self) -> tuple:
         """Returns the values for all currently selected choices"""
-        return tuple(
-            self._strip_choice(self.choices[line % len(self.choices)])  # type: ignore
-            for line in self._selected_lines
-        )
+        return tuple(self.iter_selected())
+
+    def iter_selected(self) -> Iterator[Any]:
+        """Yields the values for all currently selected choices in order"""
+        for line in self.selection:
+            yield self._strip_choice(self._store[line])
 
     def prompt(self) -> Any:
         self._line = 0
-        self._selected_lines = set()
-        if not self.choices:
+        self._top = 0
+        self.selection.clear()
+        self._rows = min(self._store.load(self._page_size), self._page_size)
+        if not self._rows:
             return None
-        i = 0
-        for i, choice in enumerate(self.choices):
-            self._display_choice(i, choice)
-        io.move_cursor(rows=-1 * i - 1)
-        io.hide_cursor()
+        self._sync_selection()
+        self._renderer = io.Renderer(self.console)
+        io.hide_cursor(console=self.console)
         try:
-            self._process_keypress()
+            with io.raw_mode(self.console), io.bracketed_paste(self.console):
+                self._render()
+                self._process_keypress()
         finally:
-            io.show_cursor()
-            io.move_cursor(rows=len(self.choices) - self._line)
+            self._renderer.finish()
+            io.show_cursor(console=self.console)
         return self.selected if self._multiselect else self.highlighted
 
 
 class SelectApproval(SelectOne):
     """Simple extension of SelectOne offering the option of selecting yes or no"""
 
-    def __init__(self, **chars: str):
+    def __init__(
+        self,
+        console: Optional[io.Console] = None,
+        keymap: Optional[Dict[str, Union[str, int]]] = None,
+        **chars: str,
+    ):
         yes = ChoiceHelper(True, "yes", None, "y")
         no = ChoiceHelper(False, "no", None, "n")
-        SelectOne.__init__(self, (yes, no), **chars)
+        SelectOne.__init__(self, (yes, no), console, keymap, **chars)
 
 
 class SelectMany(SelectOne):
     """Allows users to select multiple items using
 
     - Use arrow keys or 'j' and 'k' to highlight selection
+    - Use page-up and page-down to move a page, home and end to move to the ends
     - Press mnemonic keys to move to ChoiceHelper, another time to toggle
     - Use space key to toggle selection
+    - Use shift with the up and down arrows to select a range, which shrinks
+      again when moving back towards where it began
+    - Use ctrl-a to select all, ctrl-n to select none and ctrl-t to invert
+    - Paste lines of labels to select the matching choices
     - Use return key to submit
     """
 
     _multiselect = True
+    _keymap = KEYMAP_MANY
 
-    def _display_choice(self, idx, choice):
-        s = "%s%s %s " % (
-            " " if idx else self.chars["arrow"],
-            self.chars["unselected"],
+    def __init__(
+        self,
+        choices: Union[Iterable, Callable[[int, int], Iterable]],
+        console: Optional[io.Console] = None,
+        keymap: Optional[Dict[str, Union[str, int]]] = None,
+        **chars: str,
+    ):
+        self._anchor = 0
+        self._range_end = -1
+        self._range = (0, 0)
+        self._range_prior: Dict[int, bool] = {}
+        SelectOne.__init__(self, choices, console, keymap, **chars)
+
+    def _bind_actions(self) -> Dict[str, Callable[[str], Any]]:
+        actions = SelectOne._bind_actions(self)
+        actions.update(
+            {
+                "toggle": lambda _: self._select_line(),
+                "select-all": lambda _: self._select_bulk(self.selection.select_all),
+                "select-none": lambda _: self._select_bulk(
+                    self.selection.clear, fetch=False
+                ),
+                "invert": lambda _: self._select_bulk(self.selection.invert),
+                "select-up": lambda _: self._select_towards(-1),
+                "select-down": lambda _: self._select_towards(1),
+            }
+        )
+        return actions
+
+    def _format_choice(self, line: int, choice: Any) -> str:
+        return "%s%s %s " % (
+            self.chars["arrow"] if line == self._line else " ",
+            self.chars["selected" if line in self.selection else "unselected"],
             choice,
         )
-        print(s)
+
+    def _select_line(self):
+        self._end_range()
+        SelectOne._select_line(self)
+
+    def _end_range(self):
+        # the next range starts afresh from the highlighted line
+        self._range_end = -1
+        self._range_prior.clear()
+
+    def _select_bulk(self, operation: Callable[[], None], fetch: bool = True):
+        self._end_range()
+        if fetch:
+            # selecting every choice requires every choice to be fetched
+            self._store.load(-1)
+            self._sync_selection()
+        operation()
+        self._render()
+
+    def _paste(self, key: str):
+        lines = set(self._pasted_lines(key))
+        if not lines:
+            return
+        self._end_range()
+        matches = [
+            line
+            for line, choice in enumerate(self._store)
+            if self._label(choice) in lines
+        ]
+        self._sync_selection()
+        self.selection.select(matches)
+        self._render()
+
+    def _select_towards(self, distance: int):
+        if self._line != self._range_end:
+            self._end_range()
+            self._anchor = self._line
+            self._range = (self._line, self._line)
+        self._goto(distance, wrap=False)
+        self._range_end = self._line
+        start = min(self._anchor, self._line)
+        stop = max(self._anchor, self._line) + 1
+        old_start, old_stop = self._range
+        # lines leaving the range go back to how they were before it began
+        for line in chain(
+            range(old_start, min(start, old_stop)),
+            range(max(stop, old_start), old_stop),
+        ):
+            self.selection.select_range(line, line + 1, self._range_prior.pop(line))
+        for line in chain(range(start, min(old_start, stop)), range(old_stop, stop)):
+            self._range_prior.setdefault(line, line in self.selection)
+        self.selection.select_range(start, stop)
+        self._range = (start, stop)
+        self._render()
+
+    def prompt(self) -> Any:
+        self._end_range()
+        return SelectOne.prompt(self)
+
+
+class TextInput:
+    """Allows the user to enter a line of text
+
+    - Use left and right arrows (or ctrl-b and ctrl-f) to move the cursor
+    - Use home and end (or ctrl-a and ctrl-e) to move to the start or end
+    - Use up and down arrows to recall entries from history
+    - Use return key to submit
+
+    Text is kept in gap buffers, so edits at the cursor are cheap however long
+    the text is, and only the visible portion of the text is drawn. The label is
+    drawn before the text. When a history list is given, submitted text is
+    appended to it.
+    """
+
+    _multiline = False
+    _keymap = KEYMAP_TEXT
+
+    def __init__(
+        self,
+        label: str = "",
+        console: Optional[io.Console] = None,
+        keymap: Optional[Dict[str, str]] = None,
+        history: Optional[List[str]] = None,
+    ):
+        self.label = label
+        self.console = console or io.DEFAULT_CONSOLE
+        self.history = history if history is not None else []
+        self._history_idx = 0
+        self._draft = ""
+        self._lines: GapBuffer[str] = GapBuffer()
+        self._chars: GapBuffer[str] = GapBuffer()
+        self._top = 0
+        self._left = 0
+        self._renderer = io.Renderer(self.console)
+        self._submitted = False
+        self._actions = self._bind_actions()
+        self.keymap = self._keymap.copy()
+        for key, action in (keymap or {}).items():
+            if action not in self._actions:
+                raise ValueError("unknown action %r for key %r" % (action, key))
+            self.keymap[key] = action
+
+    @property
+    def text(self) -> str:
+        """Returns the text entered so far"""
+        lines = list(self._lines)
+        lines.insert(self._lines.cursor, "".join(self._chars))
+        return "\n".join(lines)
+
+    @text.setter
+    def text(self, text: str):
+        *lines, line = text.split("\n")
+        self._lines = GapBuffer(lines)
+        self._chars = GapBuffer(line)
+
+    @property
+    def _height(self) -> int:
+        return 1
+
+    def _bind_actions(self) -> Dict[str, Callable[[str], Any]]:
+        return {
+            "backspace": lambda _: self._backspace(),
+            "delete": lambda _: self._delete(),
+            "down": lambda _: self._move_row(1),
+            "interrupt": self._interrupt,
+            "left": lambda _: self._move_col(-1),
+            "line-end": lambda _: self._chars.move(len(self._chars)),
+            "line-start": lambda _: self._chars.move(0),
+            "paste": lambda key: self.insert(getattr(key, "text", "")),
+            "right": lambda _: self._move_col(1),
+            "space": lambda _: self._chars.insert(" "),
+            "submit": self._submit,
+            "up": lambda _: self._move_row(-1),
+        }
+
+    def _line(self, row: int) -> str:
+        cursor = self._lines.cursor
+        if row == cursor:
+            return "".join(self._chars)
+        return self._lines[row if row < cursor else row - 1]
+
+    def _goto_row(self, row: int, col: int):
+        self._lines.insert(["".join(self._chars)])
+        self._lines.move(row)
+        self._chars = GapBuffer(self._lines.delete()[0])
+        self._chars.move(col)
+
+    def _move_row(self, distance: int):
+        row = self._lines.cursor + distance
+        if 0 <= row <= len(self._lines):
+            self._goto_row(row, self._chars.cursor)
+        else:
+            self._recall(distance)
+
+    def _move_col(self, distance: int):
+        col = self._chars.cursor + distance
+        row = self._lines.cursor
+        if 0 <= col <= len(self._chars):
+            self._chars.move(col)
+        elif col < 0 and row > 0:
+            self._goto_row(row - 1, len(self._lines[row - 1]))
+        elif col > 0 and row < len(self._lines):
+            self._goto_row(row + 1, 0)
+
+    def _recall(self, distance: int):
+        idx = min(max(self._history_idx + distance, 0), len(self.history))
+        if idx == self._history_idx:
+            return
+        if self._history_idx == len(self.history):
+            self._draft = self.text
+        self._history_idx = idx
+        self.text = self.history[idx] if idx < len(self.history) else self._draft
+        if distance > 0:
+            self._goto_row(0, len(self._line(0)))
+
+    def _backspace(self):
+        if self._chars.cursor:
+            self._chars.backspace()
+        elif self._lines.cursor:
+            self._chars.insert(self._lines.backspace()[0])
+
+    def _delete(self):
+        if self._chars.cursor < len(self._chars):
+            self._chars.delete()
+        elif self._lines.cursor < len(self._lines):
+            col = self._chars.cursor
+            self._chars.insert(self._lines.delete()[0])
+            self._chars.move(col)
+
+    def _newline(self):
+        tail = self._chars.delete(len(self._chars))
+        self._lines.insert(["".join(self._chars)])
+        self._chars = GapBuffer(tail)
+        self._chars.move(0)
+
+    def insert(self, text: str):
+        """Inserts text at the cursor"""
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if not self._multiline:
+            text = text.replace("\n", " ")
+        first, *lines = text.split("\n")
+        self._chars.insert(first)
+        if lines:
+            *lines, last = lines
+            tail = self._chars.delete(len(self._chars))
+            self._lines.insert(["".join(self._chars)] + lines)
+            self._chars = GapBuffer(last)
+            self._chars.insert(tail)
+            self._chars.move(len(last))
+
+    def _submit(self, _: str):
+        self._submitted = True
+
+    @staticmethod
+    def _interrupt(key: str):
+        raise KeyboardInterrupt("%s pressed" % key)
+
+    def _render(self):
+        row = self._lines.cursor
+        col = self._chars.cursor
+        height = min(len(self._lines) + 1, self._height)
+        if row < self._top:
+            self._top = row
+        elif row >= self._top + height:
+            self._top = row - height + 1
+        # columns are measured in cells, which wide characters take two of
+        indent = self._width(io.strip_format(self.label))
+        width = max(self.console.size.columns - indent - 1, 1)
+        col = self._width(self._line(row)[:col])
+        if col < self._left:
+            self._left = col
+        elif col >= self._left + width:
+            self._left = col - width + 1
+        lines = []
+        for i in range(self._top, self._top + height):
+            prefix = self.label if i == 0 else " " * indent
+            lines.append(prefix + self._clip(self._line(i), self._left, width))
+        self._renderer.render(lines, row - self._top, indent + col - self._left)
+
+    @staticmethod
+    def _width(text: str) -> int:
+        return sum(map(io.char_width, text))
+
+    @staticmethod
+    def _clip(text: str, left: int, width: int) -> str:
+        chars = []
+        col = 0
+        for char in text:
+            char_width = io.char_width(char)
+            if char_width and col + char_width > left + width:
+                break
+            # zero width characters at the edge combine with the one left of it
+            if col > left or (col == left and char_width):
+                chars.append(char)
+            elif col + char_width > left:
+                # the part of a wide character right of the edge is blank
+                chars.append(" ")
+            col += char_width
+        return "".join(chars)
+
+    def _process_keypress(self):
+        self._submitted = False
+        while not self._submitted:
+            key = io.get_key(console=self.console)
+            action = self.keymap.get(key)
+            if action is not None:
+                self._actions[action](key)
+            elif len(key) == 1 and (key >= " " or key == "\t"):
+                self._chars.insert(key)
+            else:
+                continue
+            # skip drawing frames which would be immediately replaced, e.g. pastes
+            if self._submitted or not self.console.pending():
+                self._render()
+
+    def prompt(self) -> str:
+        self.text = ""
+        self._top = self._left = 0
+        self._history_idx = len(self.history)
+        self._renderer = io.Renderer(self.console)
+        try:
+            with io.raw_mode(self.console), io.bracketed_paste(self.console):
+                self._render()
+                self._process_keypress()
+        finally:
+            self._renderer.finish()
+        text = self.text
+        if text and (not self.history or self.history[-1] != text):
+            self.history.append(text)
+        return text
+
+
+class TextArea(TextInput):
+    """Allows the user to enter multiple lines of text
+
+    - Use arrow keys (or ctrl-b and ctrl-f) to move the cursor
+    - Use home and end (or ctrl-a and ctrl-e) to move to the start or end of lines
+    - Use page-up and page-down to move a page
+    - Use up and down arrows on the first and last lines to recall history
+    - Use return key to start a new line
+    - Use ctrl-d to submit
+
+    At most height lines are shown at once, by default as many as fit on the
+    screen.
+    """
+
+    _multiline = True
+    _keymap = KEYMAP_TEXT_AREA
+
+    def __init__(
+        self,
+        label: str = "",
+        console: Optional[io.Console] = None,
+        keymap: Optional[Dict[str, str]] = None,
+        history: Optional[List[str]] = None,
+        height: Optional[int] = None,
+    ):
+        self.height = height
+        TextInput.__init__(self, label, console, keymap, history)
+
+    @property
+    def _height(self) -> int:
+        return self.height or max(self.console.size.lines - 1, 1)
+
+    def _bind_actions(self) -> Dict[str, Callable[[str], Any]]:
+        actions = TextInput._bind_actions(self)
+        actions.update(
+            {
+                "newline": lambda _: self._newline(),
+                "page-down": lambda _: self._page(1),
+                "page-up": lambda _: self._page(-1),
+            }
+        )
+        return actions
+
+    def _page(self, direction: int):
+        row = self._lines.cursor + direction * self._height
+        row = min(max(row, 0), len(self._lines))
+        self._goto_row(row, self._chars.cursor)
+
+
+class PinnedFooter:
+    """Keeps status lines, e.g. progress bars, pinned below other output
+
+    Text written to the footer is printed above the pinned lines. Changes are
+    drawn at most once every interval seconds by erasing the footer, printing
+    pending text, and redrawing the footer, so bursts of output cost a single
+    redraw per frame. Footers are thread safe and draw while holding their
+    console's lock, so other writes to the console can't land mid-frame; use
+    close or a with statement to draw any remaining output once finished.
+    """
+
+    def __init__(self, console: Optional[io.Console] = None, interval: float = 1 / 30):
+        self.console = console or io.DEFAULT_CONSOLE
+        self.interval = interval
+        self._lock = self.console.lock
+        self._lines: Dict[Any, str] = {}
+        self._pending: List[str] = []
+        self._partial = ""
+        self._renderer = io.Renderer(self.console)
+        self._dirty = False
+        self._next_frame = 0.0
+        self._timer: Optional[Timer] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def set(self, key: Any, line: str):
+        """Pins a line to the footer, replacing the line previously set for key"""
+        with self._lock:
+            self._lines[key] = line
+            self._schedule()
+
+    def remove(self, key: Any):
+        """Unpins the line set for key"""
+        with self._lock:
+            if self._lines.pop(key, None) is not None:
+                self._schedule()
+
+    def write(self, text: str) -> int:
+        """Queues text to be printed above the footer on the next frame"""
+        with self._lock:
+            *lines, self._partial = (self._partial + text).split("\n")
+            if lines:
+                self._pending.extend(lines)
+                self._schedule()
+        return len(text)
+
+    def flush(self):
+        """Does nothing; output is drawn once per frame, see refresh"""
+
+    def refresh(self):
+        """Draws pending changes immediately"""
+        with self._lock:
+            if self._dirty:
+                self._draw()
+
+    def close(self):
+        """Draws any remaining output, leaving the footer in place"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._partial:
+                self._pending.append(self._partial)
+                self._partial = ""
+                self._dirty = True
+            if self._dirty:
+                self._draw()
+
+    def _schedule(self):
+        self._dirty = True
+        delay = self._next_frame - monotonic()
+        if delay <= 0:
+            self._draw()
+        elif not self._timer:
+            self._timer = Timer(delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if self._dirty:
+                self._draw()
+
+    def _draw(self):
+        self._dirty = False
+        self._next_frame = monotonic() + self.interval
+        if self._pending:
+            self._renderer.clear()
+            self.console.write("".join(line + "\n" for line in self._pending))
+            self._pending.clear()
+        lines = list(self._lines.values())
+        self._renderer.render(lines + [""], len(lines))
+        self.console.flush()
+
+
+class FooterHandler(logging.Handler):
+    """Logging handler which writes records above a PinnedFooter
+
+    Records are batched by the footer, so heavy logging alongside live progress
+    bars costs one redraw per frame rather than one per record.
+    """
+
+    def __init__(self, footer: PinnedFooter, level: int = logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self.footer = footer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.footer.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.footer.refresh()
 
 
 class ProgressBar:
-    """Displays a progress bar"""
+    """Displays a progress bar
+
+    Progress bars are drawn in place below other output, or as a line of a
+    PinnedFooter if one is given. Without a footer only the cells which changed
+    are redrawn on each update, unless anything else has been written to the
+    console since, in which case the whole bar is redrawn.
+    """
 
-    def __init__(self, label: str, width: Optional[int] = None, **chars: str):
+    def __init__(
+        self,
+        label: str,
+        width: Optional[int] = None,
+        console: Optional[io.Console] = None,
+        footer: Optional[PinnedFooter] = None,
+        **chars: str,
+    ):
         self.label = label
         self.width = width
-        self.chars = codes.CHARS_DEFAULT.copy()
+        self.footer = footer
+        if footer:
+            console = console or footer.console
+        self.console = console or io.DEFAULT_CONSOLE
+        self._renderer: Optional[io.Renderer] = None
+        self._writes = 0
+        self.chars = self.console.chars.copy()
         self.chars.update(chars)
 
     def process(self, iterable: Iterable, steps: int):
         """Iterates over an object, updating the progress bar on each iteration"""
-        io.hide_cursor()
+        io.hide_cursor(console=self.console)
         self.update(0, steps)
         skip_count = max(steps // 1000, 1)
         for step, _ in enumerate(iterable, 1):
             if step % skip_count == 0 or step == steps:
                 self.update(step, steps)
-        io.show_cursor()
+        if self.footer:
+            self.footer.refresh()
+        io.show_cursor(console=self.console)
 
     def update(self, step: int, steps: int):
         """Manually updates the progress bar"""
-        try:
-            # Python 3.3+ only
-            width = self.width or os.get_terminal_size().columns
-        except (AttributeError, OSError):
-            width = 80
-
+        width = self.width or self.console.size.columns
         prefix = "%s: " % self.label
         format_specifier = "%%0%dd" % len(str(steps))
         prefix += "%s/%d%s" % (
@@ -295,5 +1251,12 @@ class ProgressBar:
         line = (
             prefix + units * self.chars["block"] + (units_total - units) * " " + suffix
         )
-        io.erase_lines()
-        print("\r%s" % line)
+        if self.footer:
+            self.footer.set(self, line)
+            return
+        if not self._renderer or self.console.writes != self._writes:
+            # progress bars are drawn over the line above the cursor
+            self.console.write(codes.CURSOR["up"])
+            self._renderer = io.Renderer(self.console)
+        self._renderer.render([line, ""], 1)
+        self._writes = self.console.writes
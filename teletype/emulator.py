@@ -0,0 +1,266 @@
+"""A headless terminal for checking what is drawn to the screen
+
+Screens interpret the control sequences teletype writes into a grid of cells,
+so that output can be checked against what a user would actually see rather
+than the raw stream of escape sequences.
+"""
+
+from re import compile
+from typing import IO, List, Optional, Set, Tuple, Union
+
+from teletype import io
+
+__all__ = ["Screen"]
+
+CELL_BLANK = ("", " ")
+SEQUENCE = compile(r"\x1b\[([0-?]*)([ -/]*)([@-~])|\x1b[^\[]|[\x00-\x1f\x7f]")
+SEQUENCE_COMPLETE = compile(r"\x1b(\[[0-?]*[ -/]*[@-~]|[^\[])")
+TAB_SIZE = 8
+
+
+class Screen:
+    """An in-process VT100 style terminal which keeps a grid of cells
+
+    Screens are file-like, so they can be used as a console's output, e.g.
+    console = screen.console(). Cursor movement, erasing, SGR styles, carriage
+    returns, line feeds, backspaces, tabs and private modes (e.g. cursor
+    visibility) are interpreted, and any other sequences are ignored. Like a
+    tty in cooked mode, line feeds also return the carriage unless crlf is
+    False. Lines scrolled off the top of the screen are kept in scrollback.
+
+    Each cell is a (style, character) pair, with styles being the SGR
+    sequences applied since the last reset, as with Renderer. Characters are
+    measured with io.char_width: wide characters fill two cells, the second of
+    which holds an empty string, and zero width characters join the preceding
+    cell, also as with Renderer. The bytes written
+    and the number of cells they changed are counted, so that the redundancy
+    of output can be measured.
+    """
+
+    def __init__(self, columns: int = 80, lines: int = 24, crlf: bool = True):
+        if columns < 1 or lines < 1:
+            raise ValueError("screen must be at least one cell")
+        self.columns = columns
+        self.lines = lines
+        self.crlf = crlf
+        self.scrollback: List[str] = []
+        self.modes: Set[str] = set()
+        self.cursor_visible = True
+        self.bytes_written = 0
+        self.cells_changed = 0
+        self._grid = [[CELL_BLANK] * columns for _ in range(lines)]
+        self._row = 0
+        self._col = 0
+        self._wrap = False
+        self._style = ""
+        self._pending = ""
+
+    def __repr__(self):
+        return "Screen(%d, %d)" % (self.columns, self.lines)
+
+    @property
+    def cursor(self) -> Tuple[int, int]:
+        """Returns the row and column of the cursor"""
+        return self._row, self._col
+
+    @property
+    def display(self) -> List[str]:
+        """Returns the text of each line on screen, without trailing spaces"""
+        return [self._text(row) for row in self._grid]
+
+    @property
+    def redundancy(self) -> float:
+        """Returns the number of bytes written per cell changed"""
+        if not self.cells_changed:
+            return float("inf") if self.bytes_written else 0.0
+        return self.bytes_written / self.cells_changed
+
+    def cell(self, row: int, col: int) -> Tuple[str, str]:
+        """Returns the style and character of a cell"""
+        return self._grid[row][col]
+
+    def console(
+        self, stdin: Optional[Union[int, IO[str]]] = None, **capabilities: bool
+    ) -> io.Console:
+        """Returns a console which writes to the screen and matches its size"""
+        console = io.Console(stdin, self, **capabilities)  # type: ignore
+        console.resize(self.columns, self.lines)
+        return console
+
+    def reset_stats(self):
+        """Zeroes the counts of bytes written and cells changed"""
+        self.bytes_written = 0
+        self.cells_changed = 0
+
+    def isatty(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def write(self, text: str) -> int:
+        """Interprets text as though it were written to a terminal"""
+        length = len(text)
+        self.bytes_written += len(text.encode("utf-8"))
+        text = self._pending + text
+        self._pending = ""
+        # sequences can be split across writes
+        idx = text.rfind("\x1b")
+        if idx != -1 and not SEQUENCE_COMPLETE.match(text, idx):
+            text, self._pending = text[:idx], text[idx:]
+        position = 0
+        for match in SEQUENCE.finditer(text):
+            self._print(text[position : match.start()])
+            position = match.end()
+            sequence = match.group()
+            if match.group(3):
+                self._csi(match.group(1), match.group(3))
+            elif len(sequence) == 1:
+                self._control(sequence)
+        self._print(text[position:])
+        return length
+
+    @staticmethod
+    def _text(row: List[Tuple[str, str]]) -> str:
+        # the cells covered by wide characters hold empty strings
+        return "".join(char for _, char in row).rstrip()
+
+    def _set(self, row: int, col: int, cell: Tuple[str, str]):
+        if self._grid[row][col] != cell:
+            self._grid[row][col] = cell
+            self.cells_changed += 1
+
+    def _split(self, row: int, col: int):
+        # overwriting either half of a wide character blanks the other half
+        cells = self._grid[row]
+        if 0 < col < self.columns and cells[col][1] == "":
+            self._set(row, col - 1, CELL_BLANK)
+            self._set(row, col, CELL_BLANK)
+
+    def _erase(self, row: int, start: int, stop: int):
+        self._split(row, start)
+        self._split(row, stop)
+        for col in range(start, stop):
+            self._set(row, col, CELL_BLANK)
+
+    def _combine(self, char: str):
+        row, col = self._row, self._col
+        if not self._wrap:
+            col -= 1
+        if col >= 0 and self._grid[row][col][1] == "":
+            col -= 1
+        if col >= 0:
+            style, base = self._grid[row][col]
+            self._set(row, col, (style, base + char))
+
+    def _print(self, text: str):
+        style = self._style
+        for char in text:
+            width = io.char_width(char)
+            if not width:
+                self._combine(char)
+                continue
+            # wide characters which don't fit at the end of a line wrap early
+            if self._wrap or self._col + width > self.columns:
+                self._col = 0
+                self._line_feed()
+            row, col = self._row, self._col
+            self._split(row, col)
+            self._split(row, col + width)
+            self._set(row, col, (style, char))
+            if width == 2:
+                self._set(row, col + 1, (style, ""))
+            if col + width == self.columns:
+                # the cursor stays put until another character is printed
+                self._col = self.columns - 1
+                self._wrap = True
+            else:
+                self._col = col + width
+
+    def _line_feed(self):
+        self._wrap = False
+        if self._row < self.lines - 1:
+            self._row += 1
+            return
+        self.scrollback.append(self._text(self._grid.pop(0)))
+        self._grid.append([CELL_BLANK] * self.columns)
+
+    def _move(self, row: int, col: int):
+        self._row = min(max(row, 0), self.lines - 1)
+        self._col = min(max(col, 0), self.columns - 1)
+        self._wrap = False
+
+    def _control(self, char: str):
+        if char == "\r":
+            self._move(self._row, 0)
+        elif char == "\n":
+            if self.crlf:
+                self._col = 0
+            self._line_feed()
+        elif char == "\b":
+            self._move(self._row, self._col - 1)
+        elif char == "\t":
+            self._move(self._row, (self._col // TAB_SIZE + 1) * TAB_SIZE)
+
+    def _csi(self, params: str, final: str):
+        if params.startswith("?"):
+            if final in "hl":
+                self._private_modes(params[1:].split(";"), final == "h")
+            return
+        if final == "m":
+            self._sgr(params)
+            return
+        args = [int(arg) if arg.isdigit() else 0 for arg in params.split(";")]
+        n = max(args[0], 1)
+        if final == "A":
+            self._move(self._row - n, self._col)
+        elif final == "B":
+            self._move(self._row + n, self._col)
+        elif final == "C":
+            self._move(self._row, self._col + n)
+        elif final == "D":
+            self._move(self._row, self._col - n)
+        elif final == "G":
+            self._move(self._row, n - 1)
+        elif final in "Hf":
+            col = args[1] if len(args) > 1 else 0
+            self._move(n - 1, max(col, 1) - 1)
+        elif final == "J":
+            self._erase_display(args[0])
+        elif final == "K":
+            self._erase_line(args[0])
+
+    def _erase_line(self, mode: int):
+        if mode == 0:
+            self._erase(self._row, self._col, self.columns)
+        elif mode == 1:
+            self._erase(self._row, 0, self._col + 1)
+        elif mode == 2:
+            self._erase(self._row, 0, self.columns)
+
+    def _erase_display(self, mode: int):
+        if mode == 3:
+            self.scrollback.clear()
+            return
+        start = 0 if mode else self._row + 1
+        stop = self._row if mode == 1 else self.lines
+        for row in range(start, stop):
+            self._erase(row, 0, self.columns)
+        self._erase_line(mode)
+
+    def _private_modes(self, modes: List[str], enabled: bool):
+        for mode in modes:
+            if mode == "25":
+                self.cursor_visible = enabled
+            elif enabled:
+                self.modes.add(mode)
+            else:
+                self.modes.discard(mode)
+
+    def _sgr(self, params: str):
+        args = params.split(";")
+        if args[0] in ("", "0"):
+            self._style = ""
+            args = args[1:]
+        if args:
+            self._style += "\x1b[%sm" % ";".join(args)
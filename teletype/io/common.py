@@ -1,14 +1,29 @@
-from re import sub
-from sys import stdout
-from typing import Any, Optional
+import os
+import sys
+from codecs import getincrementaldecoder
+from contextlib import contextmanager
+from re import compile
+from select import select
+from threading import RLock
+from time import monotonic
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from unicodedata import category, east_asian_width
 
 from teletype import codes
 from teletype.typedef import TSTYLE
 
 __all__ = [
+    "Console",
+    "DEFAULT_CONSOLE",
+    "Paste",
+    "Renderer",
+    "bracketed_paste",
+    "char_width",
     "erase_lines",
     "erase_screen",
     "hide_cursor",
+    "cursor_commands",
+    "decode_key",
     "move_cursor",
     "show_cursor",
     "strip_format",
@@ -17,22 +32,518 @@ __all__ = [
     "style_input",
 ]
 
+CAPABILITIES_DEFAULT = {
+    "bracketed-paste": True,
+    "synchronized-output": False,
+    "unicode": True,
+}
 
-def erase_lines(n: int = 1):
+SEQUENCE = compile(r"(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]")
+SPAN_GAP = 4  # unchanged cells cheaper to redraw than to move past
+
+
+class Console:
+    """Input, output, and terminal state for a single terminal session
+
+    Consoles are bound to sys.stdin and sys.stdout by default, but can be given
+    any pair of text streams or file descriptors, e.g. the slave end of a pty,
+    so that a single process can drive several terminals at once. Output is
+    buffered until flush is called. Writing and flushing hold lock, which can
+    also be held to keep several writes from being interleaved with output from
+    other threads. Input should only be read by one thread at a time. writes
+    counts calls to write, so that drawing code can tell when something else
+    has been written since it last drew.
+    """
+
+    size_ttl = 1.0
+
+    def __init__(
+        self,
+        stdin: Optional[Union[int, IO[str]]] = None,
+        stdout: Optional[Union[int, IO[str]]] = None,
+        encoding: str = "utf-8",
+        **capabilities: bool,
+    ):
+        self._stdin = stdin
+        self._stdout = stdout
+        self.encoding = encoding
+        self.capabilities = CAPABILITIES_DEFAULT.copy()
+        self.capabilities.update(capabilities)
+        self._decoder = getincrementaldecoder(encoding)(errors="replace")
+        self._input = ""
+        self._output: List[str] = []
+        self.lock = RLock()
+        self.writes = 0
+        self._size: Optional[os.terminal_size] = None
+        self._size_expiry = 0.0
+
+    @property
+    def stdin(self) -> Union[int, IO[str]]:
+        """Returns the input stream or file descriptor"""
+        return sys.stdin if self._stdin is None else self._stdin
+
+    @property
+    def stdout(self) -> Union[int, IO[str]]:
+        """Returns the output stream or file descriptor"""
+        return sys.stdout if self._stdout is None else self._stdout
+
+    @property
+    def input_fd(self) -> Optional[int]:
+        """Returns the input file descriptor, or None if input isn't backed by one"""
+        return self._fileno(self.stdin)
+
+    @property
+    def output_fd(self) -> Optional[int]:
+        """Returns the output file descriptor, or None if output isn't backed by one"""
+        return self._fileno(self.stdout)
+
+    @property
+    def chars(self) -> Dict[str, str]:
+        """Returns the character set supported by the console"""
+        if self.capabilities.get("unicode"):
+            return codes.CHARS_DEFAULT
+        return codes.CHARS_ASCII
+
+    @property
+    def size(self) -> os.terminal_size:
+        """Returns the console's dimensions as (columns, lines)
+
+        Sizes are queried at most once every size_ttl seconds unless pinned
+        using resize; consoles of unknown size are assumed to be 80x24.
+        """
+        if self._size is None or monotonic() > self._size_expiry:
+            fd = self.output_fd
+            if fd is None:
+                fd = self.input_fd
+            try:
+                self._size = os.get_terminal_size(fd)  # type: ignore
+            except (OSError, TypeError, ValueError):
+                self._size = None
+            if not self._size or not all(self._size):
+                self._size = os.terminal_size((80, 24))
+            self._size_expiry = monotonic() + self.size_ttl
+        return self._size
+
+    def resize(self, columns: Optional[int] = None, lines: Optional[int] = None):
+        """Pins the console's size, e.g. on a window change from a remote client
+
+        Calling without arguments unpins the size so that it's queried again.
+        """
+        if columns is None or lines is None:
+            self._size = None
+        else:
+            self._size = os.terminal_size((columns, lines))
+            self._size_expiry = float("inf")
+
+    def read(self, n: int = 1) -> str:
+        """Reads n characters, blocking until they're available"""
+        fd = self.input_fd
+        if fd is not None:
+            while len(self._input) < n:
+                data = os.read(fd, 1024)
+                if not data:
+                    break
+                self._input += self._decoder.decode(data)
+            chars, self._input = self._input[:n], self._input[n:]
+            return chars
+        return self.stdin.read(n)  # type: ignore
+
+    def read_key(self) -> str:
+        """Reads the raw character sequence for a single key press
+
+        Raises EOFError once input has ended.
+        """
+        char = self.read(1)
+        if not char:
+            raise EOFError("end of console input")
+        if char != "\x1b":
+            return char
+        chars = [char, self.read(1)]
+        if chars[1] == "[":
+            # control sequences end with a final byte in the range of '@' to '~'
+            while True:
+                char = self.read(1)
+                chars.append(char)
+                if not char or "@" <= char <= "~":
+                    break
+        elif chars[1] == "O":
+            chars.append(self.read(1))
+        sequence = "".join(chars)
+        if sequence == codes.KEYS["paste-start"]:
+            sequence += self.read_until(codes.KEYS["paste-end"])
+        return sequence
+
+    def read_until(self, terminator: str) -> str:
+        """Reads characters up to and including terminator, or until input ends"""
+        fd = self.input_fd
+        if fd is None:
+            chars = []
+            text = ""
+            while not text.endswith(terminator):
+                char = self.read(1)
+                if not char:
+                    break
+                chars.append(char)
+                text = "".join(chars[-len(terminator) :])
+            return "".join(chars)
+        start = 0
+        while True:
+            idx = self._input.find(terminator, start)
+            if idx != -1:
+                idx += len(terminator)
+                text, self._input = self._input[:idx], self._input[idx:]
+                return text
+            start = max(len(self._input) - len(terminator) + 1, 0)
+            data = os.read(fd, 65536)
+            if not data:
+                text, self._input = self._input, ""
+                return text
+            self._input += self._decoder.decode(data)
+
+    def readline(self) -> str:
+        """Reads a line of input, excluding the trailing newline"""
+        chars = []
+        while True:
+            char = self.read(1)
+            if char in ("", "\n", "\r"):
+                break
+            chars.append(char)
+        return "".join(chars)
+
+    def pending(self) -> bool:
+        """Returns True if input can be read without blocking"""
+        if self._input:
+            return True
+        fd = self.input_fd
+        if fd is None:
+            return False
+        try:
+            return bool(select([fd], [], [], 0)[0])
+        except (OSError, ValueError):
+            return False
+
+    def write(self, text: str) -> int:
+        """Buffers text to be written to the console on the next flush"""
+        with self.lock:
+            self._output.append(text)
+            self.writes += 1
+        return len(text)
+
+    def flush(self):
+        """Writes buffered output to the console"""
+        with self.lock:
+            if not self._output:
+                return
+            text = "".join(self._output)
+            self._output.clear()
+            stdout = self.stdout
+            if isinstance(stdout, int):
+                data = text.encode(self.encoding)
+                while data:
+                    data = data[os.write(stdout, data) :]
+            else:
+                stdout.write(text)
+                stdout.flush()
+
+    @staticmethod
+    def _fileno(stream: Union[int, IO[str]]) -> Optional[int]:
+        if isinstance(stream, int):
+            return stream
+        try:
+            return stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+
+DEFAULT_CONSOLE = Console()
+
+
+class Paste(str):
+    """The key returned by get_key for text pasted using bracketed paste
+
+    Pastes compare equal to "paste"; the pasted text is available as text.
+    """
+
+    text: str
+
+    def __new__(cls, text: str):
+        paste = str.__new__(cls, "paste")
+        paste.text = text
+        return paste
+
+
+class Renderer:
+    """Draws frames of lines to a console, writing only what has changed
+
+    The region drawn to starts at the line the cursor is on when the renderer
+    is created and grows downwards as needed. The renderer keeps a model of the
+    cells last drawn to each line, so each frame only emits the spans of cells
+    which differ, using parameterized cursor movement to get to them. Lines are
+    clipped to the width of the console so that they never wrap, measuring
+    characters with char_width.
+    """
+
+    def __init__(self, console: Optional[Console] = None):
+        self.console = console or DEFAULT_CONSOLE
+        self._texts: List[Optional[str]] = []
+        self._cells: List[List[Tuple[str, str]]] = []
+        self._row = 0
+        self._col: Optional[int] = None
+        self._reset()
+
+    def _reset(self):
+        # contents of the cursor's line and any created below it are unknown
+        self._texts = [None]
+        self._cells = [[]]
+        self._row = 0
+        self._col = None
+
+    @property
+    def height(self) -> int:
+        """Returns the number of lines in the region"""
+        return len(self._texts)
+
+    def render(self, lines: Sequence[str], row: int = 0, col: int = 0):
+        """Draws lines to the region and leaves the cursor on the given cell"""
+        commands: List[str] = []
+        columns = self.console.size.columns
+        for i, text in enumerate(lines):
+            if i < len(self._texts) and self._texts[i] == text:
+                continue
+            if i >= len(self._texts):
+                self._extend(commands, i + 1)
+            cells = self._parse(text, columns)
+            self._draw_line(commands, i, cells)
+            self._texts[i] = text
+            self._cells[i] = cells
+        for i in range(len(lines), len(self._texts)):
+            if self._texts[i] != "":
+                self._draw_line(commands, i, [])
+                self._texts[i] = ""
+                self._cells[i] = []
+        self._extend(commands, row + 1)
+        self._move(commands, row, col)
+        if not commands:
+            return
+        if self.console.capabilities.get("synchronized-output"):
+            commands.insert(0, codes.TERMINAL["sync-begin"])
+            commands.append(codes.TERMINAL["sync-end"])
+        self.console.write("".join(commands))
+        self.console.flush()
+
+    def clear(self):
+        """Erases the region, leaving the cursor where it began
+
+        Output isn't flushed, so that text written in the region's place is
+        drawn along with the next frame.
+        """
+        commands = []
+        self._move(commands, 0, 0)
+        commands.append(codes.CURSOR["eos"])
+        self.console.write("".join(commands))
+        self._reset()
+        self._texts[0] = ""
+        self._col = 0
+
+    def finish(self):
+        """Moves the cursor to a new line below the region and resets it"""
+        commands = []
+        self._move(commands, len(self._texts) - 1, 0)
+        commands.append("\n")
+        self.console.write("".join(commands))
+        self.console.flush()
+        self._reset()
+
+    def _extend(self, commands: List[str], height: int):
+        if height <= len(self._texts):
+            return
+        self._move(commands, len(self._texts) - 1, 0)
+        commands.append("\n" * (height - len(self._texts)))
+        self._row = height - 1
+        self._col = None
+        self._texts.extend([None] * (height - len(self._texts)))
+        self._cells.extend([] for _ in range(height - len(self._cells)))
+
+    def _move(self, commands: List[str], row: int, col: int):
+        commands.append(cursor_commands(rows=row - self._row))
+        self._row = row
+        if col == self._col:
+            return
+        if col == 0:
+            commands.append("\r")
+        else:
+            commands.append(codes.CURSOR_N["column"] % (col + 1))
+        self._col = col
+
+    def _draw_line(self, commands: List[str], row: int, cells: List[Tuple[str, str]]):
+        if self._texts[row] is None:
+            spans, erase = [(0, len(cells))], True
+        else:
+            old = self._cells[row]
+            spans = self._diff(cells, old)
+            erase = len(cells) < len(old)
+            if not spans and not erase:
+                return
+        columns = self.console.size.columns
+        for start, stop in spans:
+            self._move(commands, row, start)
+            style = ""
+            for cell_style, char in cells[start:stop]:
+                if not char:
+                    continue
+                if cell_style != style:
+                    if style:
+                        commands.append(codes.MODES["reset"])
+                    commands.append(cell_style)
+                    style = cell_style
+                commands.append(char)
+            if style:
+                commands.append(codes.MODES["reset"])
+            # writing to the last column leaves the cursor's position ambiguous
+            self._col = stop if stop < columns else None
+        # erasing after writing to the last column would erase that column too
+        if erase and len(cells) < columns:
+            self._move(commands, row, len(cells))
+            commands.append(codes.CURSOR["eol"])
+
+    def _diff(
+        self, cells: List[Tuple[str, str]], old: List[Tuple[str, str]]
+    ) -> List[Tuple[int, int]]:
+        # spans of changed cells, joined where moving past the gap between
+        # them would cost more than redrawing it
+        spans: List[Tuple[int, int]] = []
+        for col, cell in enumerate(cells):
+            if col < len(old) and cell == old[col]:
+                continue
+            if spans and spans[-1][1] > col:
+                continue
+            start, stop = col, col + 1
+            # redraw wide characters whole rather than from their second cell
+            while start and (self._splits(cells, start) or self._splits(old, start)):
+                start -= 1
+            while stop < len(cells) and (
+                self._splits(cells, stop) or self._splits(old, stop)
+            ):
+                stop += 1
+            if spans and start - spans[-1][1] <= SPAN_GAP:
+                start = spans.pop()[0]
+            spans.append((start, stop))
+        return spans
+
+    @staticmethod
+    def _splits(cells: List[Tuple[str, str]], col: int) -> bool:
+        return col < len(cells) and cells[col][1] == ""
+
+    @staticmethod
+    def _parse(text: str, columns: int) -> List[Tuple[str, str]]:
+        cells: List[Tuple[str, str]] = []
+        style = ""
+        position = 0
+        # the trailing reset flushes the characters after the last sequence
+        for match in SEQUENCE.finditer(text + codes.MODES["reset"]):
+            for char in text[position : match.start()]:
+                width = char_width(char)
+                if not width:
+                    # zero width characters combine with the preceding cell
+                    if cells:
+                        col = len(cells) - 2 if cells[-1][1] == "" else -1
+                        cells[col] = (cells[col][0], cells[col][1] + char)
+                    continue
+                if len(cells) + width > columns:
+                    return cells
+                cells.append((style, char if char >= " " else " "))
+                if width == 2:
+                    # wide characters are followed by an empty cell they cover
+                    cells.append((style, ""))
+            position = match.end()
+            sequence = match.group()
+            if sequence[-1] != "m":
+                continue
+            if sequence[:-1].lstrip("\x1b[\x9b") in ("", "0"):
+                style = ""
+            else:
+                style += sequence
+        return cells
+
+
+def char_width(char: str) -> int:
+    """Returns the number of cells a character takes up on screen
+
+    East Asian wide and fullwidth characters (e.g. CJK and most emoji) take two
+    cells, combining marks and format characters take none and others take one.
+    """
+    if category(char) in ("Me", "Mn", "Cf"):
+        return 0
+    return 2 if east_asian_width(char) in ("F", "W") else 1
+
+
+@contextmanager
+def bracketed_paste(console: Optional[Console] = None) -> Iterator[None]:
+    """Enables bracketed paste for the duration of a with block
+
+    While enabled, supporting terminals mark pasted text so that get_key can
+    return it as a single Paste key rather than a key per character. Nothing is
+    done for consoles without the bracketed-paste capability.
+    """
+    console = console or DEFAULT_CONSOLE
+    if not console.capabilities.get("bracketed-paste"):
+        yield
+        return
+    console.write(codes.TERMINAL["paste-on"])
+    console.flush()
+    try:
+        yield
+    finally:
+        console.write(codes.TERMINAL["paste-off"])
+        console.flush()
+
+
+def decode_key(sequence: str) -> str:
+    """Returns the name of the key for a raw sequence read from a console"""
+    start = codes.KEYS["paste-start"]
+    if sequence.startswith(start) and len(sequence) > len(start):
+        end = codes.KEYS["paste-end"]
+        if sequence.endswith(end):
+            sequence = sequence[: -len(end)]
+        return Paste(sequence[len(start) :])
+    return codes.KEYS_FLIPPED.get(sequence, sequence)
+
+
+def cursor_commands(cols: int = 0, rows: int = 0) -> str:
+    """Returns the control sequences which move the cursor by cols and rows"""
+    commands = ""
+    if rows:
+        direction = "up" if rows < 0 else "down"
+        if abs(rows) == 1:
+            commands += codes.CURSOR[direction]
+        else:
+            commands += codes.CURSOR_N[direction] % abs(rows)
+    if cols:
+        direction = "left" if cols < 0 else "right"
+        if abs(cols) == 1:
+            commands += codes.CURSOR[direction]
+        else:
+            commands += codes.CURSOR_N[direction] % abs(cols)
+    return commands
+
+
+def erase_lines(n: int = 1, console: Optional[Console] = None):
     """Erases n lines from the screen and moves the cursor up to follow"""
+    console = console or DEFAULT_CONSOLE
     for _ in range(n):
-        print(codes.CURSOR["up"], end="")
-        print(codes.CURSOR["eol"], end="")
-    stdout.flush()
+        console.write(codes.CURSOR["up"])
+        console.write(codes.CURSOR["eol"])
+    console.flush()
 
 
-def erase_screen():
+def erase_screen(console: Optional[Console] = None):
     """Clears all text from the screen"""
-    print(codes.CURSOR["clear"], end="")
-    stdout.flush()
+    console = console or DEFAULT_CONSOLE
+    console.write(codes.CURSOR["clear"])
+    console.flush()
 
 
-def move_cursor(cols: int = 0, rows: int = 0):
+def move_cursor(cols: int = 0, rows: int = 0, console: Optional[Console] = None):
     """Moves the cursor the given number of columns and rows
 
     The cursor is moved right when cols is positive and left when negative.
@@ -40,29 +551,28 @@ def move_cursor(cols: int = 0, rows: int = 0):
     """
     if cols == 0 and rows == 0:
         return
-    commands = ""
-    commands += codes.CURSOR["up" if rows < 0 else "down"] * abs(rows)
-    commands += codes.CURSOR["left" if cols < 0 else "right"] * abs(cols)
-    if commands:
-        print(commands, end="")
-        stdout.flush()
+    console = console or DEFAULT_CONSOLE
+    console.write(cursor_commands(cols, rows))
+    console.flush()
 
 
-def show_cursor():
+def show_cursor(console: Optional[Console] = None):
     """Shows the cursor indicator"""
-    print(codes.CURSOR["show"], end="")
-    stdout.flush()
+    console = console or DEFAULT_CONSOLE
+    console.write(codes.CURSOR["show"])
+    console.flush()
 
 
-def hide_cursor():
+def hide_cursor(console: Optional[Console] = None):
     """Hides the cursor indicator; remember to call show_cursor before exiting"""
-    print(codes.CURSOR["hide"], end="")
-    stdout.flush()
+    console = console or DEFAULT_CONSOLE
+    console.write(codes.CURSOR["hide"])
+    console.flush()
 
 
 def strip_format(text: str) -> str:
     """Returns text with all control sequences removed"""
-    return sub(r"(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]", "", text)
+    return SEQUENCE.sub("", text)
 
 
 def style_format(text: str, style: TSTYLE = None, reset: bool = True) -> str:
@@ -87,14 +597,30 @@ def style_format(text: str, style: TSTYLE = None, reset: bool = True) -> str:
 
 
 def style_print(*values: Any, **options: Any):
-    """A convenience function that applies style_format to text before printing"""
+    """A convenience function that applies style_format to text before printing
+
+    A console can be passed using the console keyword argument.
+    """
     style = options.pop("style", None)
+    console = options.pop("console", None)
     values = tuple(style_format(value, style) for value in values)
-    print(*values, **options)
+    if console:
+        print(*values, file=console, **options)
+        console.flush()
+    else:
+        print(*values, **options)
 
 
-def style_input(prompt: Optional[str] = None, style: TSTYLE = None) -> str:
+def style_input(
+    prompt: Optional[str] = None,
+    style: TSTYLE = None,
+    console: Optional[Console] = None,
+) -> str:
     """A convenience function that applies style_format before get user input"""
     if prompt and style:
         prompt = style_format(prompt, style)
-    return input(prompt)
+    if not console:
+        return input(prompt)
+    console.write(prompt or "")
+    console.flush()
+    return console.readline()
@@ -1,30 +1,40 @@
-from sys import stdin
+from contextlib import contextmanager
+from os import isatty
 from termios import TCSADRAIN, tcgetattr, tcsetattr
 from tty import setraw
+from typing import Iterator, Optional
 
-from teletype import codes
+from teletype.io.common import DEFAULT_CONSOLE, Console, decode_key
 
-__all__ = ["get_key"]
+__all__ = ["get_key", "raw_mode"]
 
 
-def get_key(raw: bool = False) -> str:
-    """Gets a single key from stdin"""
-    file_descriptor = stdin.fileno()
+@contextmanager
+def raw_mode(console: Optional[Console] = None) -> Iterator[None]:
+    """Puts the console's terminal into raw mode for the duration of a with block
+
+    Keeping the terminal in raw mode between calls to get_key stops input which
+    arrives in the meantime from being echoed.
+    """
+    console = console or DEFAULT_CONSOLE
+    file_descriptor = console.input_fd
+    if file_descriptor is None or not isatty(file_descriptor):
+        yield
+        return
     state = tcgetattr(file_descriptor)
-    chars = []
     try:
-        setraw(stdin.fileno())
-        for i in range(3):
-            char = stdin.read(1)
-            ordinal = ord(char)
-            chars.append(char)
-            if i == 0 and ordinal != 27:
-                break
-            if i == 1 and ordinal != 91:
-                break
-            if i == 2 and ordinal != 51:
-                break
+        setraw(file_descriptor, TCSADRAIN)
+        yield
     finally:
         tcsetattr(file_descriptor, TCSADRAIN, state)
-    result = "".join(chars)
-    return result if raw else codes.KEYS_FLIPPED.get(result, result)
+
+
+def get_key(raw: bool = False, console: Optional[Console] = None) -> str:
+    """Gets a single key from the console's input, stdin by default
+
+    Raises EOFError once input has ended, e.g. when a pty's client disconnects.
+    """
+    console = console or DEFAULT_CONSOLE
+    with raw_mode(console):
+        result = console.read_key()
+    return result if raw else decode_key(result)
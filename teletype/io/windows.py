@@ -1,12 +1,30 @@
+from contextlib import contextmanager
 from msvcrt import getch, kbhit  # type: ignore
+from typing import Iterator, Optional
 
 from teletype.codes import KEYS_FLIPPED, SCAN_CODES
+from teletype.io.common import DEFAULT_CONSOLE, Console, decode_key
 
-__all__ = ["get_key"]
+__all__ = ["get_key", "raw_mode"]
 
 
-def get_key(raw: bool = False) -> str:
-    """Gets a single key from stdin"""
+@contextmanager
+def raw_mode(console: Optional[Console] = None) -> Iterator[None]:
+    """Does nothing on Windows, where msvcrt reads keys without echoing them"""
+    yield
+
+
+def get_key(raw: bool = False, console: Optional[Console] = None) -> str:
+    """Gets a single key from the console's input, stdin by default
+
+    Only the default console reads from the Windows console, other consoles are
+    read from as plain character streams. Bracketed pastes are only recognised
+    from the latter since msvcrt doesn't report them, and only the latter raise
+    EOFError once input has ended.
+    """
+    if console and console is not DEFAULT_CONSOLE:
+        result = console.read_key()
+        return result if raw else decode_key(result)
     while True:
         try:
             if kbhit():